@@ -1,19 +1,31 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import openai
+import requests
 from serpapi import GoogleSearch
-import json
+from tenacity import retry, stop_after_attempt, wait_exponential_jitter, retry_if_exception_type
+import tiktoken
+import diskcache
+import orjson
+import hashlib
 import time
 from datetime import datetime
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import queue
 import os
+import logging
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Page configuration
 st.set_page_config(
     page_title="AMEX Mobile Experience Insights",
@@ -23,7 +35,7 @@ st.set_page_config(
 )
 
 # Custom CSS for better styling
-st.markdown("""
+CUSTOM_CSS = """
 <style>
     .main-header {
         font-size: 3rem;
@@ -53,146 +65,469 @@ st.markdown("""
         margin: 2rem 0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+# Streamlit drops elements a rerun doesn't emit, so the style block is re-sent on
+# every run; collapsing its whitespace keeps that payload small
+_CUSTOM_CSS_MINIFIED = " ".join(CUSTOM_CSS.split())
 
-def fetch_app_store_reviews(app_id, api_key, max_reviews=25):
-    """Fetch Apple App Store reviews using SerpAPI"""
+st.markdown(_CUSTOM_CSS_MINIFIED, unsafe_allow_html=True)
+
+# Token budget for the review portion of the analysis prompt
+REVIEW_TOKEN_BUDGET = 3000
+
+# Reviews whose 5-gram shingle overlap with an earlier review exceeds this are collapsed
+NEAR_DUPLICATE_THRESHOLD = 0.8
+
+# Review sets smaller or more repetitive than this are summarized locally instead of calling OpenAI
+MIN_REVIEWS_FOR_ANALYSIS = 3
+MIN_DISTINCT_REVIEW_RATIO = 0.1
+
+# rating_distribution is computed locally, so it is not requested from the model
+ANALYSIS_SYSTEM_PROMPT = (
+    "You are an app review analyst. Output ONLY JSON matching: "
+    "{overall_sentiment:positive|neutral|negative,sentiment_score:float 0-1,key_themes:[str],common_issues:[str],"
+    "strengths:[str],user_experience_feedback:str,feature_requests:[str]}"
+)
+
+# Guards against JSON mode emitting trailing whitespace until the context limit
+ANALYSIS_MAX_TOKENS = 1000
+
+REVIEWS_CACHE_EXPIRE = 6 * 60 * 60
+ANALYSIS_CACHE_EXPIRE = 6 * 60 * 60
+
+# Prefetches from concurrent sessions run in parallel up to this many; the
+# timeout (seconds) keeps a stalled SerpAPI request from holding a worker
+PREFETCH_WORKERS = 8
+SERPAPI_TIMEOUT = 30
+
+# Streamlit re-executes this script on every rerun, so long-lived objects are
+# created through st.cache_resource rather than at module level
+
+@st.cache_resource
+def get_disk_cache():
+    """On-disk cache shared across sessions and server restarts"""
+    return diskcache.Cache("./.cache/app", size_limit=100 * 1024 * 1024)
+
+@st.cache_resource
+def get_encoding():
+    """Tokenizer for the review budget; gpt-4o and gpt-4o-mini share o200k_base"""
+    # tiktoken downloads the BPE file on first use, so a network failure surfaces
+    # inside the analysis instead of on every rerun
+    return tiktoken.get_encoding("o200k_base")
+
+@st.cache_resource
+def get_prefetch_executor():
+    """Background workers for review prefetches, shared by all sessions"""
+    return ThreadPoolExecutor(max_workers=PREFETCH_WORKERS)
+
+class NoReviewsFound(Exception):
+    """Raised when SerpAPI returns no reviews for an app"""
+
+class AnalysisTruncated(Exception):
+    """Raised when the model is cut off at ANALYSIS_MAX_TOKENS"""
+
+class SerpApiError(Exception):
+    """Raised when SerpAPI answers with an error instead of results"""
+
+class SerpApiTransientError(SerpApiError):
+    """A SerpAPI rate-limit (429) or server (5xx) error worth retrying"""
+
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential_jitter(initial=1, max=10),
+    retry=retry_if_exception_type((requests.exceptions.RequestException, SerpApiTransientError)),
+    reraise=True
+)
+def _search_serpapi(params):
+    """Run a SerpAPI search, retrying network, rate-limit and server errors"""
+    search = GoogleSearch(params)
+    search.timeout = SERPAPI_TIMEOUT
+    # get_dict() never checks the HTTP status, so read the response directly
+    response = search.get_response()
     try:
-        search = GoogleSearch({
-            "engine": "apple_reviews",
-            "product_id": app_id,
-            "api_key": api_key,
-            "num": max_reviews
-        })
-        
-        results = search.get_dict()
-        
-        if "reviews" not in results:
-            st.error(f"No reviews found for app ID: {app_id}")
-            return []
-        
-        reviews = results["reviews"]
+        results = orjson.loads(response.text)
+    except orjson.JSONDecodeError:
+        results = None
+    if not isinstance(results, dict):
+        results = {}
+    
+    error = results.get("error") or (f"HTTP {response.status_code}" if not response.ok else None)
+    if response.status_code == 429 or response.status_code >= 500:
+        raise SerpApiTransientError(error)
+    if error:
+        raise SerpApiError(error)
+    
+    return results
+
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential_jitter(initial=1, max=10),
+    retry=retry_if_exception_type((openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)),
+    reraise=True
+)
+def _create_chat_completion(openai_client, **kwargs):
+    """Start a chat completion, retrying rate limits, connection errors and 5xx responses"""
+    return openai_client.chat.completions.create(**kwargs)
+
+@st.cache_data(ttl=1800, show_spinner=False)
+def _fetch_reviews_cached(app_id, api_key, max_reviews):
+    """Fetch raw reviews from SerpAPI, memoized for 30 minutes and on disk for 6 hours"""
+    key = f"{app_id}:{max_reviews}"
+    reviews = get_disk_cache().get(key)
+    if reviews is not None:
         return reviews
-        
+    
+    results = _search_serpapi({
+        "engine": "apple_reviews",
+        "product_id": app_id,
+        "api_key": api_key,
+        "num": max_reviews
+    })
+    
+    # Raise instead of returning an empty list so misses are never cached
+    if "reviews" not in results:
+        raise NoReviewsFound(app_id)
+    
+    reviews = [dict(review) for review in results["reviews"]]
+    get_disk_cache().set(key, reviews, expire=REVIEWS_CACHE_EXPIRE)
+    return reviews
+
+def _load_reviews(app_id, api_key, max_reviews):
+    """Fetch reviews as (reviews, error_kind, message) instead of raising"""
+    # The prefetch Future outlives the rerun that started it, and every rerun
+    # redefines the exception classes above, so errors cross reruns as plain values
+    try:
+        return _fetch_reviews_cached(app_id, api_key, max_reviews), None, None
+    except NoReviewsFound:
+        return [], "no_reviews", None
+    except SerpApiError as e:
+        return [], "serpapi", str(e)
     except Exception as e:
-        st.error(f"Error fetching reviews: {str(e)}")
-        return []
+        return [], "error", str(e)
+
+def prefetch_app_store_reviews(app_id, api_key, max_reviews=25):
+    """Start fetching reviews in the background, once per session and settings"""
+    args = (app_id, api_key, max_reviews)
+    prefetched = st.session_state.get("prefetched_reviews")
+    if prefetched is None or prefetched[0] != args:
+        prefetched = (args, get_prefetch_executor().submit(_load_reviews, *args))
+        st.session_state["prefetched_reviews"] = prefetched
+    return prefetched[1]
+
+def fetch_app_store_reviews(app_id, api_key, max_reviews=25, prefetched=None):
+    """Fetch Apple App Store reviews using SerpAPI"""
+    # A prefetch still queued behind other sessions is cancelled and run here
+    # instead, so "Run Analysis" never waits on the shared pool. A failed prefetch
+    # may predate a recovery, so only a successful one stands in for the fetch
+    result = None
+    if prefetched is not None and not prefetched.cancel():
+        result = prefetched.result()
+    if result is None or result[1]:
+        result = _load_reviews(app_id, api_key, max_reviews)
+    reviews, error_kind, message = result
+    
+    if error_kind == "no_reviews":
+        st.error(f"No reviews found for app ID: {app_id}")
+    elif error_kind == "serpapi":
+        st.error(f"SerpAPI error: {message}")
+    elif error_kind:
+        st.error(f"Error fetching reviews: {message}")
+    
+    return reviews
+
+class _StreamedFieldParser:
+    """Incrementally extract completed top-level fields from a streamed JSON object"""
+    
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._field_start = 0
+    
+    def feed(self, text):
+        """Consume a chunk of text and return any (key, value) pairs it completed"""
+        self._buffer += text
+        fields = []
+        while self._pos < len(self._buffer):
+            char = self._buffer[self._pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._field_start = self._pos + 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    fields.extend(self._close_field())
+            elif char == "," and self._depth == 1:
+                fields.extend(self._close_field())
+                self._field_start = self._pos + 1
+            self._pos += 1
+        return fields
+    
+    def _close_field(self):
+        segment = self._buffer[self._field_start:self._pos].strip()
+        if not segment:
+            return []
+        try:
+            return list(orjson.loads("{" + segment + "}").items())
+        except orjson.JSONDecodeError:
+            return []
 
-def analyze_reviews_with_openai(reviews, app_name, openai_client):
-    """Analyze reviews using OpenAI API"""
+@st.cache_data(ttl=3600, show_spinner=False)
+def _cached_openai_analyze(prompt_hash: str, _prompt: str, model: str, _api_key: str, _on_field=None) -> str:
+    """Run the OpenAI analysis call, memoized on the review content hash and model"""
+    # Both cache layers key on the order-independent review hash rather than the
+    # prompt text, so the same reviews in a different order still hit
+    key = "analysis:" + hashlib.sha256(f"{model}\n{ANALYSIS_SYSTEM_PROMPT}\n{prompt_hash}".encode()).hexdigest()
+    analysis_text = get_disk_cache().get(key)
+    if analysis_text is not None:
+        return analysis_text
+    
+    # Retries are handled by _create_chat_completion, so the client's own are disabled
+    openai_client = openai.OpenAI(api_key=_api_key, max_retries=0)
+    response = _create_chat_completion(
+        openai_client,
+        model=model,
+        messages=[
+            {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+            {"role": "user", "content": _prompt}
+        ],
+        temperature=0.3,
+        max_tokens=ANALYSIS_MAX_TOKENS,
+        response_format={"type": "json_object"},
+        stream=True
+    )
+    
+    parser = _StreamedFieldParser()
+    chunks = []
+    finish_reason = None
+    for chunk in response:
+        if not chunk.choices:
+            continue
+        finish_reason = chunk.choices[0].finish_reason or finish_reason
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            continue
+        chunks.append(delta)
+        if _on_field is not None:
+            for field, value in parser.feed(delta):
+                _on_field(field, value)
+    
+    analysis_text = "".join(chunks)
+    # A cut-off answer is incomplete even if it happens to parse, so it is never cached
+    if finish_reason == "length":
+        raise AnalysisTruncated(
+            f"The {model} response exceeded the {ANALYSIS_MAX_TOKENS}-token output limit. "
+            "Try again later or select a different model."
+        )
+    
+    # JSON mode guarantees raw JSON, so a decode error means a truncated or failed
+    # response; raising here keeps it out of both cache layers
     try:
-        # Prepare review text for analysis
-        review_texts = []
-        ratings = []
-        
-        for review in reviews:
-            if "text" in review and review["text"]:
-                review_texts.append(review["text"])
-            if "rating" in review:
-                ratings.append(review["rating"])
-        
-        if not review_texts:
-            return None, None
-        
-        # Create analysis prompt
-        prompt = f"""
-        Analyze the following {len(review_texts)} Apple App Store reviews for {app_name}.
-        
-        Reviews:
-        {' '.join(review_texts[:50])}  # Limit to first 50 reviews to avoid token limits
-        
-        You must respond with ONLY valid JSON in this exact format:
-        {{
-            "overall_sentiment": "positive",
-            "sentiment_score": 0.8,
-            "key_themes": ["user interface", "performance", "features"],
-            "common_issues": ["slow loading", "buggy", "missing features"],
-            "strengths": ["easy to use", "reliable", "good design"],
-            "user_experience_feedback": "Users generally find the app intuitive but report performance issues",
-            "feature_requests": ["dark mode", "better search", "offline support"],
-            "rating_distribution": {{
-                "1_star": 0,
-                "2_star": 0,
-                "3_star": 0,
-                "4_star": 0,
-                "5_star": 0
-            }}
-        }}
-        
-        IMPORTANT: Respond with ONLY the JSON object, no additional text or explanations.
-        """
-        
-        response = openai_client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an expert app analyst specializing in user feedback analysis."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,
-            max_tokens=1000
+        orjson.loads(analysis_text)
+    except orjson.JSONDecodeError:
+        logger.exception("%s returned invalid JSON: %r", model, analysis_text[:200])
+        raise
+    get_disk_cache().set(key, analysis_text, expire=ANALYSIS_CACHE_EXPIRE)
+    return analysis_text
+
+def _stream_openai_analyze(prompt_hash, prompt, model, api_key, on_field):
+    """Run the cached analysis call on a worker, reporting fields on the script thread"""
+    # Streamlit elements may only be updated from the script thread, so the
+    # worker hands completed fields back through a queue. Each call gets its own
+    # worker so concurrent sessions never wait on each other or on prefetches
+    fields = queue.Queue()
+    with ThreadPoolExecutor(max_workers=1) as worker:
+        future = worker.submit(
+            _cached_openai_analyze, prompt_hash, prompt, model, api_key,
+            lambda key, value: fields.put((key, value))
         )
+        while not future.done() or not fields.empty():
+            try:
+                key, value = fields.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            on_field(key, value)
+        
+        return future.result()
+
+def _shingles(text, size=5):
+    """Character n-gram shingles of a normalized review"""
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+def deduplicate_reviews(review_texts, threshold=NEAR_DUPLICATE_THRESHOLD):
+    """Collapse exact and near-duplicate reviews, returning (text, count) pairs"""
+    normalized = [" ".join(text.lower().split()) for text in review_texts]
+    counts = Counter()
+    representatives = {}
+    accepted = []
+    
+    for text, norm in zip(review_texts, normalized):
+        if norm in representatives:
+            counts[representatives[norm]] += 1
+            continue
+        
+        shingles = _shingles(norm)
+        match = None
+        for prior_norm, prior_shingles in accepted:
+            overlap = len(shingles & prior_shingles) / len(shingles | prior_shingles)
+            if overlap > threshold:
+                match = representatives[prior_norm]
+                break
+        
+        if match is None:
+            match = text
+            accepted.append((norm, shingles))
+        representatives[norm] = match
+        counts[match] += 1
+    
+    return list(counts.items())
+
+def truncate_reviews_to_budget(review_texts, budget=REVIEW_TOKEN_BUDGET):
+    """Fit reviews into a token budget by trimming only the longest ones"""
+    encoding = get_encoding()
+    tokens = [encoding.encode(text) for text in review_texts]
+    lengths = sorted(len(t) for t in tokens)
+    
+    if sum(lengths) <= budget:
+        return list(review_texts)
+    
+    # Find the largest per-review cap T with sum(min(len, T)) <= budget
+    remaining = budget
+    threshold = 0
+    for i, length in enumerate(lengths):
+        left = len(lengths) - i
+        if length * left > remaining:
+            threshold = remaining // left
+            break
+        remaining -= length
+    
+    return [
+        text if len(t) <= threshold else encoding.decode(t[:threshold])
+        for text, t in zip(review_texts, tokens)
+    ]
+
+def _trivial_analysis(unique_reviews, rating_counts):
+    """Template analysis for inputs too small or repetitive to be worth an LLM call"""
+    total = int(rating_counts.sum())
+    mean_rating = float(np.dot(np.arange(1, 6), rating_counts)) / total if total else 3.0
+    sentiment_score = (mean_rating - 1) / 4
+    if mean_rating >= 3.5:
+        sentiment = "positive"
+    elif mean_rating <= 2.5:
+        sentiment = "negative"
+    else:
+        sentiment = "neutral"
+    
+    return {
+        "overall_sentiment": sentiment,
+        "sentiment_score": round(sentiment_score, 2),
+        "key_themes": ["limited variation"],
+        "common_issues": [],
+        "strengths": [],
+        "user_experience_feedback": (
+            f"Only {len(unique_reviews)} distinct review(s) were available, averaging "
+            f"{mean_rating:.1f} stars; not enough variation for a detailed analysis."
+        ),
+        "feature_requests": []
+    }
+
+def analyze_reviews_with_openai(reviews, app_name, api_key, model="gpt-4o-mini", on_field=None):
+    """Analyze reviews using OpenAI API, calling on_field(key, value) as fields stream in"""
+    try:
+        # Keep only reviews with both text and a rating so texts and ratings stay aligned
+        pairs = [
+            (review["text"], review["rating"])
+            for review in reviews
+            if review.get("text") and review.get("rating") is not None
+        ]
+        
+        if not pairs:
+            return None, None, None
+        
+        review_texts, ratings = map(list, zip(*pairs))
+        
+        # Star histogram for ratings 1-5, shared with the rating chart. Out-of-range
+        # values are masked out branch-free; intp keeps them from wrapping on cast
+        rating_array = np.asarray(ratings, dtype=np.intp)
+        rating_array = rating_array[(rating_array >= 1) & (rating_array <= 5)]
+        rating_counts = np.bincount(rating_array, minlength=6)[1:6]
+        rating_distribution = {
+            f"{stars}_star": int(count) for stars, count in enumerate(rating_counts, start=1)
+        }
         
-        analysis_text = response.choices[0].message.content
+        # Send each distinct review once, tagged with how often it appeared
+        unique_reviews = deduplicate_reviews(review_texts)
+        
+        # Skip the OpenAI call when the answer is effectively determined by the ratings
+        if (
+            len(ratings) < MIN_REVIEWS_FOR_ANALYSIS
+            or len(unique_reviews) == 1
+            or len(unique_reviews) / len(review_texts) < MIN_DISTINCT_REVIEW_RATIO
+        ):
+            analysis = _trivial_analysis(unique_reviews, rating_counts)
+            analysis["rating_distribution"] = rating_distribution
+            return analysis, ratings, rating_counts
+        
+        truncated = truncate_reviews_to_budget([text for text, _ in unique_reviews])
+        reviews_joined = "\n---\n".join(
+            f"[x{count}] {text}" if count > 1 else text
+            for text, (_, count) in zip(truncated, unique_reviews)
+        )
         
-        # Try to parse JSON response
-        try:
-            # Clean the response text - remove any markdown formatting
-            cleaned_text = analysis_text.strip()
-            if cleaned_text.startswith('```json'):
-                cleaned_text = cleaned_text[7:]
-            if cleaned_text.endswith('```'):
-                cleaned_text = cleaned_text[:-3]
-            cleaned_text = cleaned_text.strip()
-            
-            analysis = json.loads(cleaned_text)
-        except json.JSONDecodeError as e:
-            st.warning("Analysis completed but some formatting issues were encountered. Showing available insights.")
-            
-            # If JSON parsing fails, create a structured response
-            analysis = {
-                "overall_sentiment": "neutral",
-                "sentiment_score": 0.5,
-                "key_themes": ["User feedback analysis completed"],
-                "common_issues": ["Review analysis available"],
-                "strengths": ["User insights gathered"],
-                "user_experience_feedback": "Analysis completed successfully",
-                "feature_requests": ["User feedback processed"],
-                "rating_distribution": {"1_star": 0, "2_star": 0, "3_star": 0, "4_star": 0, "5_star": 0}
-            }
+        # Create analysis prompt; the output schema lives in the system message
+        prompt = f"Analyze these {len(review_texts)} Apple App Store reviews for {app_name}:\n{reviews_joined}"
         
-        # Calculate rating distribution from actual data
-        rating_counts = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-        for rating in ratings:
-            if rating in rating_counts:
-                rating_counts[rating] += 1
-        
-        analysis["rating_distribution"] = {
-            "1_star": rating_counts[1],
-            "2_star": rating_counts[2],
-            "3_star": rating_counts[3],
-            "4_star": rating_counts[4],
-            "5_star": rating_counts[5]
-        }
+        # Identical review sets for the same app reuse the cached response
+        review_hash = hashlib.sha256("\n".join(sorted(review_texts)).encode()).hexdigest()
+        prompt_hash = hashlib.sha256(f"{app_name}\n{review_hash}".encode()).hexdigest()
+        if on_field is None:
+            analysis_text = _cached_openai_analyze(prompt_hash, prompt, model, api_key)
+        else:
+            analysis_text = _stream_openai_analyze(prompt_hash, prompt, model, api_key, on_field)
+        
+        # Already validated by _cached_openai_analyze before it was returned or cached
+        analysis = orjson.loads(analysis_text)
+        
+        analysis["rating_distribution"] = rating_distribution
+        
+        return analysis, ratings, rating_counts
         
-        return analysis, ratings
+    except AnalysisTruncated as e:
+        st.error(f"Response truncated: {str(e)}")
+        return None, None, None
         
     except Exception as e:
         st.error(f"Error analyzing reviews with OpenAI: {str(e)}")
-        return None, None
+        return None, None, None
 
-def create_rating_chart(ratings, app_name):
-    """Create rating distribution chart"""
-    if not ratings:
+@st.cache_data(ttl=1800, show_spinner=False)
+def create_rating_chart(rating_counts, app_name):
+    """Create rating distribution chart from 1-5 star counts"""
+    if rating_counts is None or not rating_counts.any():
         return None
     
-    rating_counts = pd.Series(ratings).value_counts().sort_index()
+    stars = np.arange(1, 6)
     
     fig = px.bar(
-        x=rating_counts.index,
-        y=rating_counts.values,
+        x=stars,
+        y=rating_counts,
         title=f"{app_name} - Rating Distribution",
         labels={'x': 'Rating', 'y': 'Number of Reviews'},
-        color=rating_counts.values,
+        color=rating_counts,
         color_continuous_scale='viridis'
     )
     
@@ -229,6 +564,7 @@ def main():
         st.subheader("Analysis Settings")
         st.info("📊 Analysis will process 25 recent reviews for optimal performance and cost efficiency")
         max_reviews = 25  # Fixed at 25 reviews
+        openai_model = st.selectbox("OpenAI Model", ["gpt-4o-mini", "gpt-4o"], help="gpt-4o-mini is faster and cheaper; gpt-4o gives more detailed analysis")
         
         # Run analysis button
         run_analysis = st.button("🚀 Run Analysis", type="primary", use_container_width=True)
@@ -237,7 +573,7 @@ def main():
             st.info("""
             This app analyzes Apple App Store reviews for the American Express App using:
             - SerpAPI Apple Reviews API for fetching reviews
-            - OpenAI GPT-4 for sentiment analysis and theme extraction
+            - OpenAI GPT-4o models for sentiment analysis and theme extraction
             - Built by Ava Fonss
             """)
     
@@ -252,10 +588,10 @@ def main():
         st.warning("⚠️ Please enter your API keys in the sidebar or set them in your .env file to begin analysis.")
         return
     
+    # The app ID is fixed, so reviews can be fetched before "Run Analysis" is clicked
+    prefetched_reviews = prefetch_app_store_reviews(amex_app_id, serpapi_key, max_reviews)
+    
     if run_analysis:
-        # Initialize OpenAI client
-        openai_client = openai.OpenAI(api_key=openai_api_key)
-        
         # Progress tracking
         progress_bar = st.progress(0)
         status_text = st.empty()
@@ -264,7 +600,9 @@ def main():
         status_text.text("Fetching Recent American Express App reviews...")
         progress_bar.progress(50)
         
-        amex_reviews = fetch_app_store_reviews(amex_app_id, serpapi_key, max_reviews)
+        amex_reviews = fetch_app_store_reviews(amex_app_id, serpapi_key, max_reviews, prefetched_reviews)
+        # Consume the prefetch so the next run picks up fresh reviews once the cache expires
+        st.session_state.pop("prefetched_reviews", None)
         if not amex_reviews:
             st.error("Failed to fetch app reviews. Please check the app ID and API key.")
             return
@@ -275,13 +613,36 @@ def main():
         status_text.text("Analyzing reviews with OpenAI...")
         progress_bar.progress(90)
         
-        amex_analysis, amex_ratings = analyze_reviews_with_openai(amex_reviews, "American Express", openai_client)
+        # Show each insight as soon as its field finishes streaming
+        preview = st.empty()
+        with preview.container():
+            preview_sections = {
+                "overall_sentiment": st.empty(),
+                "key_themes": st.empty(),
+                "common_issues": st.empty(),
+                "strengths": st.empty()
+            }
+        
+        def show_streamed_field(key, value):
+            if key not in preview_sections:
+                return
+            if key == "overall_sentiment":
+                preview_sections[key].metric("Overall Sentiment", str(value).title())
+            else:
+                title = key.replace("_", " ").title()
+                items = "\n".join(f"• **{item}**" for item in (value if isinstance(value, list) else [value]))
+                preview_sections[key].markdown(f"**{title}**\n\n{items}")
+        
+        amex_analysis, amex_ratings, amex_rating_counts = analyze_reviews_with_openai(
+            amex_reviews, "American Express", openai_api_key, openai_model, on_field=show_streamed_field
+        )
         
         progress_bar.progress(100)
         status_text.text("Analysis complete!")
         time.sleep(1)
         progress_bar.empty()
         status_text.empty()
+        preview.empty()
         
         if not amex_analysis:
             st.error("Failed to analyze reviews. Please check your OpenAI API key and try again.")
@@ -355,7 +716,7 @@ def main():
             
             with col2:
                 if amex_ratings:
-                    fig = create_rating_chart(amex_ratings, "American Express")
+                    fig = create_rating_chart(amex_rating_counts, "American Express")
                     if fig:
                         st.plotly_chart(fig, use_container_width=True)
         
@@ -391,7 +752,7 @@ def main():
         st.subheader("📥 Download Results")
         
         if amex_analysis:
-            amex_json = json.dumps(amex_analysis, indent=2)
+            amex_json = orjson.dumps(amex_analysis, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS).decode()
             st.download_button(
                 label="Download American Express App Analysis (JSON)",
                 data=amex_json,